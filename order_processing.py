@@ -1,9 +1,16 @@
 import csv
 import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
-from typing import List, Any, Optional, NamedTuple
+from typing import List, Any, Optional, NamedTuple, Set, Tuple, Dict
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class OrderType(Enum):
     EXPORT = 'A'
@@ -35,6 +42,10 @@ class OrderPriority(Enum):
     HIGH = 'high'
 
 
+_STATUS_BY_VALUE = {member.value: member for enum in (OrderStatus, OrderError) for member in enum}
+_PRIORITY_BY_VALUE = {member.value: member for member in OrderPriority}
+
+
 class Configuration:
     HIGH_PRIORITY_THRESHOLD = 200.0
     HIGH_VALUE_ORDER_THRESHOLD = 150.0
@@ -51,7 +62,16 @@ class ProcessingResult(NamedTuple):
         return self.status is not None and self.error is None
 
 
+# Shared results returned by APIOrderProcessor.determine_status.
+_API_PROCESSED = ProcessingResult(status=OrderStatus.PROCESSED)
+_API_PENDING = ProcessingResult(status=OrderStatus.PENDING)
+_API_STATUS_ERROR = ProcessingResult(status=OrderStatus.ERROR)
+_API_ERROR = ProcessingResult(error=OrderError.API_ERROR)
+
+
 class Order:
+    __slots__ = ('id', 'type', 'amount', 'flag', 'status', 'priority')
+
     def __init__(self, id: int, type: OrderType, amount: float, flag: bool):
         self.id = id
         self.type = type
@@ -74,6 +94,8 @@ class FileExportException(Exception):
 
 
 class APIResponse:
+    __slots__ = ('status', 'data')
+
     def __init__(self, status: str, data: Any):
         self.status = status
         self.data = data
@@ -88,40 +110,113 @@ class DatabaseService(ABC):
     def update_order_status(self, order_id: int, status: OrderStatus, priority: OrderPriority) -> bool:
         pass
 
+    def batch_update_order_status(self, updates: List[Tuple[int, str, str]]) -> Set[int]:
+        # Updates carry the enum values; the fallback maps them back for the
+        # single-row API, one round trip per row.
+        status_by_value = _STATUS_BY_VALUE
+        priority_by_value = _PRIORITY_BY_VALUE
+        failed_ids = set()
+        for order_id, status_value, priority_value in updates:
+            status = status_by_value[status_value]
+            priority = priority_by_value[priority_value]
+            try:
+                if not self.update_order_status(order_id, status, priority):
+                    failed_ids.add(order_id)
+            except DatabaseException:
+                failed_ids.add(order_id)
+        return failed_ids
+
+    def get_orders_columns(self, user_id: int) -> Dict[str, Any]:
+        # Fallback for backends that cannot return columns directly.
+        if np is None:
+            raise ImportError("get_orders_columns requires numpy")
+        orders = self.get_orders_by_user(user_id)
+        return {
+            'ids': np.array([order.id for order in orders], dtype=np.int64),
+            'types': np.array([order.type.value for order in orders], dtype=str),
+            'amounts': np.array([order.amount for order in orders], dtype=np.float64),
+            'flags': np.array([order.flag for order in orders], dtype=bool),
+            'priorities': np.array([order.priority.value for order in orders], dtype=str)
+        }
+
 
 class APIClient(ABC):
     @abstractmethod
     def call_api(self, order_id: int) -> APIResponse:
         pass
 
+    def call_api_many(self, order_ids: List[int]) -> List[APIResponse]:
+        # Fallback for clients without a batch endpoint: one round trip per order.
+        return [self.call_api(order_id) for order_id in order_ids]
+
 
 class FileExporter(ABC):
     @abstractmethod
     def export_order_to_file(self, order: Order, user_id: int) -> None:
         pass
 
+    def export_batch(self, orders: List[Order], user_id: int) -> List[Order]:
+        # Exporters without batch support write one file per order, so a failed
+        # file only fails its own order; the orders that failed are returned.
+        failed_orders = []
+        for order in orders:
+            try:
+                self.export_order_to_file(order, user_id)
+            except FileExportException:
+                failed_orders.append(order)
+        return failed_orders
+
+
+_BOOL_STR = ('false', 'true')
+_HIGH_VALUE_NOTE = ['', '', '', '', 'Note', 'High value order']
+
 
 class CSVFileExporter(FileExporter):
+    HEADER = ['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority']
+    BATCH_BUFFER_SIZE = 1 << 20
+
+    def _order_rows(self, orders: List[Order]):
+        high_value_threshold = Configuration.HIGH_VALUE_ORDER_THRESHOLD
+        for order in orders:
+            amount = order.amount
+            type_value = order.type.value
+            status_value = order.status.value
+            priority_value = order.priority.value
+            yield [order.id, type_value, amount, _BOOL_STR[order.flag], status_value, priority_value]
+            if amount > high_value_threshold:
+                yield _HIGH_VALUE_NOTE
+
     def export_order_to_file(self, order: Order, user_id: int) -> None:
         timestamp = int(time.time())
         csv_file = f'orders_type_A_{user_id}_{timestamp}.csv'
         try:
             with open(csv_file, 'w', newline='') as file_handle:
                 writer = csv.writer(file_handle)
-                writer.writerow(['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority'])
-                writer.writerow([
-                    order.id,
-                    order.type.value,
-                    order.amount,
-                    str(order.flag).lower(),
-                    order.status.value,
-                    order.priority.value
-                ])
-                if order.amount > Configuration.HIGH_VALUE_ORDER_THRESHOLD:
-                    writer.writerow(['', '', '', '', 'Note', 'High value order'])
+                writer.writerow(self.HEADER)
+                for row in self._order_rows((order,)):
+                    writer.writerow(row)
         except IOError as e:
             raise FileExportException(f"Can not export csv: {str(e)}")
 
+    def export_batch(self, orders: List[Order], user_id: int) -> List[Order]:
+        # The file is local to the call, so one exporter can serve concurrent
+        # batches; batches without orders do not leave empty files behind.
+        # All orders share one file, so a failure raises for the whole batch.
+        if not orders:
+            return []
+        timestamp = int(time.time())
+        csv_file = f'orders_type_A_{user_id}_{timestamp}.csv'
+        try:
+            # Buffered write errors may only surface on close, which the
+            # with block does inside this handler.
+            with open(csv_file, 'w', newline='', buffering=self.BATCH_BUFFER_SIZE) as file_handle:
+                writer = csv.writer(file_handle)
+                writer.writerow(self.HEADER)
+                writer.writerows(self._order_rows(orders))
+        except IOError as e:
+            raise FileExportException(f"Can not export csv: {str(e)}")
+        return []
+
 
 class OrderProcessor(ABC):
     @abstractmethod
@@ -142,27 +237,106 @@ class ExportOrderProcessor(OrderProcessor):
         except FileExportException:
             return ProcessingResult(error=OrderError.EXPORT_FAILED)
 
+    def process_many(self, orders: List[Order]) -> List[ProcessingResult]:
+        if not orders:
+            return []
+        try:
+            for order in orders:
+                order.status = OrderStatus.EXPORTED
+            failed_orders = self.file_exporter.export_batch(orders, self.user_id)
+        except FileExportException:
+            return [ProcessingResult(error=OrderError.EXPORT_FAILED)] * len(orders)
+        exported = ProcessingResult(status=OrderStatus.EXPORTED)
+        if not failed_orders:
+            return [exported] * len(orders)
+        export_failed = ProcessingResult(error=OrderError.EXPORT_FAILED)
+        failed_orders = set(failed_orders)
+        return [export_failed if order in failed_orders else exported for order in orders]
+
 
 class APIOrderProcessor(OrderProcessor):
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, cache_size: int = 0):
         self.api_client = api_client
+        # Responses are cached per order id only when cache_size > 0.
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _remember(self, order_id: int, api_response: APIResponse) -> None:
+        # Failed responses are not cached so that a retry reaches the API again.
+        if api_response.status != 'success':
+            return
+        cache = self._cache
+        cache[order_id] = api_response
+        cache.move_to_end(order_id)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _call_api(self, order_id: int) -> APIResponse:
+        if not self.cache_size:
+            return self.api_client.call_api(order_id)
+        cache = self._cache
+        if order_id in cache:
+            cache.move_to_end(order_id)
+            return cache[order_id]
+        api_response = self.api_client.call_api(order_id)
+        self._remember(order_id, api_response)
+        return api_response
+
+    def _call_api_many(self, order_ids: List[int]) -> List[APIResponse]:
+        if not self.cache_size:
+            return self.api_client.call_api_many(order_ids)
+        cache = self._cache
+        api_responses = {}
+        missing_ids = []
+        for order_id in order_ids:
+            if order_id in cache:
+                cache.move_to_end(order_id)
+                api_responses[order_id] = cache[order_id]
+            else:
+                missing_ids.append(order_id)
+        if missing_ids:
+            for order_id, api_response in zip(missing_ids, self.api_client.call_api_many(missing_ids)):
+                api_responses[order_id] = api_response
+                self._remember(order_id, api_response)
+        return [api_responses[order_id] for order_id in order_ids]
 
     def determine_status(self, api_response: APIResponse, order: Order) -> ProcessingResult:
+        data_threshold = Configuration.API_DATA_THRESHOLD
+        amount_threshold = Configuration.API_AMOUNT_THRESHOLD
         if api_response.status != 'success':
-            return ProcessingResult(error=OrderError.API_ERROR)
-        if api_response.data >= Configuration.API_DATA_THRESHOLD and order.amount < Configuration.API_AMOUNT_THRESHOLD:
-            return ProcessingResult(status=OrderStatus.PROCESSED)
-        elif api_response.data < Configuration.API_DATA_THRESHOLD or order.flag:
-            return ProcessingResult(status=OrderStatus.PENDING)
-        return ProcessingResult(status=OrderStatus.ERROR)
+            return _API_ERROR
+        data = api_response.data
+        if data >= data_threshold and order.amount < amount_threshold:
+            return _API_PROCESSED
+        elif data < data_threshold or order.flag:
+            return _API_PENDING
+        return _API_STATUS_ERROR
 
     def process(self, order: Order) -> ProcessingResult:
         try:
-            api_response = self.api_client.call_api(order.id)
+            api_response = self._call_api(order.id)
             return self.determine_status(api_response, order)
         except APIException:
             return ProcessingResult(error=OrderError.API_FAILURE)
 
+    def process_many(self, orders: List[Order]) -> List[ProcessingResult]:
+        if not orders:
+            return []
+        # Ids are submitted sorted to help server-side locality; results keep the input order.
+        indices = sorted(range(len(orders)), key=lambda index: orders[index].id)
+        try:
+            api_responses = self._call_api_many([orders[index].id for index in indices])
+        except APIException:
+            return [ProcessingResult(error=OrderError.API_FAILURE)] * len(orders)
+        determine_status = self.determine_status
+        results = [None] * len(orders)
+        for index, api_response in zip(indices, api_responses):
+            results[index] = determine_status(api_response, orders[index])
+        return results
+
 
 class SimpleOrderProcessor(OrderProcessor):
     def process(self, order: Order) -> ProcessingResult:
@@ -182,24 +356,16 @@ class PriorityCalculator:
 
 
 class OrderProcessingService:
-    def __init__(self, db_service: DatabaseService, api_client: APIClient, file_exporter: FileExporter):
+    def __init__(self, db_service: DatabaseService, api_client: APIClient, file_exporter: FileExporter,
+                 api_cache_size: int = 0, overlap_api_calls: bool = False):
         self.db_service = db_service
         self.api_client = api_client
         self.file_exporter = file_exporter
-        self.priority_calculator = PriorityCalculator()
-        self.processors = {
-            OrderType.EXPORT: ExportOrderProcessor,
-            OrderType.API: APIOrderProcessor,
-            OrderType.SIMPLE: SimpleOrderProcessor
-        }
-
-    def _get_processor(self, order: Order, user_id: int) -> OrderProcessor:
-        processor_class = self.processors.get(order.type, UnknownOrderProcessor)
-        if order.type == OrderType.EXPORT:
-            return processor_class(self.file_exporter, user_id)
-        elif order.type == OrderType.API:
-            return processor_class(self.api_client)
-        return processor_class()
+        self.api_processor = APIOrderProcessor(api_client, cache_size=api_cache_size)
+        self.unknown_processor = UnknownOrderProcessor()
+        # API calls only leave the caller thread when overlapping is enabled,
+        # so thread-affine clients keep working by default.
+        self._api_executor = ThreadPoolExecutor(max_workers=1) if overlap_api_calls else None
 
     def process_orders(self, user_id: int) -> bool:
         try:
@@ -207,26 +373,117 @@ class OrderProcessingService:
             if not orders:
                 return False
 
-            success = True
+            worklists = defaultdict(list)
             for order in orders:
-                processor = self._get_processor(order, user_id)
-                result = processor.process(order)
-
-                if result.is_success:
-                    order.status = result.status
-                else:
-                    order.status = result.error
-
-                order.priority = self.priority_calculator.determine_priority(order.amount)
-
-                try:
-                    if not self.db_service.update_order_status(order.id, order.status, order.priority):
-                        order.status = OrderError.DB_ERROR
-                        success = False
-                except DatabaseException:
-                    order.status = OrderError.DB_ERROR
-                    success = False
+                worklists[order.type].append(order)
+
+            export_processor = ExportOrderProcessor(self.file_exporter, user_id)
+            api_orders = worklists.pop(OrderType.API, [])
+            export_orders = worklists.pop(OrderType.EXPORT, [])
+            api_future = None
+            if api_orders and export_orders and self._api_executor is not None:
+                # The API round trip runs on the worker thread while exports and
+                # local processing continue here.
+                api_future = self._api_executor.submit(self.api_processor.process_many, api_orders)
+
+            results = dict(zip(export_orders, export_processor.process_many(export_orders)))
+
+            # SIMPLE orders are resolved inline with shared results instead
+            # of a SimpleOrderProcessor call per order.
+            completed = ProcessingResult(status=OrderStatus.COMPLETED)
+            in_progress = ProcessingResult(status=OrderStatus.IN_PROGRESS)
+            for order in worklists.pop(OrderType.SIMPLE, ()):
+                results[order] = completed if order.flag else in_progress
+
+            # Every type left over has no processor of its own.
+            unknown_processor = self.unknown_processor
+            for worklist in worklists.values():
+                for order in worklist:
+                    results[order] = unknown_processor.process(order)
+
+            if api_future is not None:
+                results.update(zip(api_orders, api_future.result()))
+            else:
+                results.update(zip(api_orders, self.api_processor.process_many(api_orders)))
+
+            high_priority_threshold = Configuration.HIGH_PRIORITY_THRESHOLD
+            high_priority = OrderPriority.HIGH
+            low_priority = OrderPriority.LOW
+            staged = []
+            pending_updates = []
+            for order, result in results.items():
+                status = result.status
+                if status is None:
+                    status = result.error
+                priority = high_priority if order.amount > high_priority_threshold else low_priority
+                staged.append((order, status, priority))
+                pending_updates.append((order.id, status.value, priority.value))
+
+            pending_updates.sort(key=lambda update: update[0])
+            try:
+                failed_ids = self.db_service.batch_update_order_status(pending_updates)
+            except DatabaseException:
+                failed_ids = {order.id for order in orders}
+
+            # Final status and priority are assigned once the batched update has
+            # reported back. Export orders already carry EXPORTED, which the CSV
+            # rows are written from.
+            db_error = OrderError.DB_ERROR
+            for order, status, priority in staged:
+                order.status = db_error if order.id in failed_ids else status
+                order.priority = priority
+
+            return not failed_ids
+        except Exception:
+            return False
 
-            return success
+    def process_orders_bulk(self, user_id: int) -> bool:
+        if np is None:
+            raise ImportError("process_orders_bulk requires numpy")
+        try:
+            columns = self.db_service.get_orders_columns(user_id)
+            ids = columns['ids']
+            if not len(ids):
+                return False
+            types = columns['types']
+            amounts = columns['amounts']
+            flags = columns['flags']
+
+            priorities = np.where(amounts > Configuration.HIGH_PRIORITY_THRESHOLD,
+                                  OrderPriority.HIGH.value, OrderPriority.LOW.value)
+            statuses = np.full(len(ids), OrderError.UNKNOWN_TYPE.value, dtype=object)
+            simple_mask = types == OrderType.SIMPLE.value
+            statuses[simple_mask] = np.where(flags[simple_mask], OrderStatus.COMPLETED.value, OrderStatus.IN_PROGRESS.value)
+
+            # Only EXPORT and API rows do I/O and go through the object-mode processors.
+            api_rows = np.flatnonzero(types == OrderType.API.value)
+            api_orders = [Order(int(ids[row]), OrderType.API, float(amounts[row]), bool(flags[row]))
+                          for row in api_rows]
+            for row, result in zip(api_rows, self.api_processor.process_many(api_orders)):
+                statuses[row] = (result.status if result.status is not None else result.error).value
+
+            # Exported rows show the stored priority, as in process_orders.
+            export_rows = np.flatnonzero(types == OrderType.EXPORT.value)
+            stored_priorities = columns['priorities']
+            export_orders = []
+            for row in export_rows:
+                order = Order(int(ids[row]), OrderType.EXPORT, float(amounts[row]), bool(flags[row]))
+                order.priority = _PRIORITY_BY_VALUE[stored_priorities[row]]
+                export_orders.append(order)
+            export_processor = ExportOrderProcessor(self.file_exporter, user_id)
+            export_results = export_processor.process_many(export_orders)
+            for row, result in zip(export_rows, export_results):
+                statuses[row] = (result.status if result.status is not None else result.error).value
+
+            sort_index = np.argsort(ids, kind='stable')
+            pending_updates = list(zip(ids[sort_index].tolist(),
+                                       statuses[sort_index].tolist(),
+                                       priorities[sort_index].tolist()))
+            try:
+                failed_ids = self.db_service.batch_update_order_status(pending_updates)
+            except DatabaseException:
+                failed_ids = set(ids.tolist())
+
+            return not failed_ids
         except Exception:
-            return False
\ No newline at end of file
+            return False
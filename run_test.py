@@ -17,17 +17,18 @@ class MockDatabaseService(DatabaseService):
                 Order(7, OrderType.UNKNOWN, 50.0, False),
             ]
         }
+        self._by_id = {order.id: order for order in self.orders[1]}
 
     def get_orders_by_user(self, user_id: int) -> List[Order]:
         return self.orders.get(user_id, [])
 
     def update_order_status(self, order_id: int, status: OrderStatus, priority: OrderPriority) -> bool:
-        for order in self.orders[1]:
-            if order.id == order_id:
-                order.status = status
-                order.priority = priority
-                return True
-        return False
+        order = self._by_id.get(order_id)
+        if order is None:
+            return False
+        order.status = status
+        order.priority = priority
+        return True
 
 # Mock APIClient
 class MockAPIClient(APIClient):
@@ -1,6 +1,12 @@
+import csv
+import errno
+import os
+import tempfile
+import threading
 import unittest
 from unittest.mock import Mock, patch
 
+from order_processing import np
 from order_processing import (
     Order, OrderType, OrderStatus, OrderError, OrderPriority, OrderProcessingService,
     ExportOrderProcessor, APIOrderProcessor, SimpleOrderProcessor, UnknownOrderProcessor,
@@ -14,6 +20,8 @@ class TestOrderProcessing(unittest.TestCase):
         self.api_client = Mock(spec=APIClient)
         self.file_exporter = Mock(spec=FileExporter)
         self.service = OrderProcessingService(self.db_service, self.api_client, self.file_exporter)
+        self.db_service.batch_update_order_status.return_value = set()
+        self.file_exporter.export_batch.return_value = []
 
     # Test processing when no orders are returned from the database
     def test_process_orders_no_orders(self):
@@ -21,110 +29,269 @@ class TestOrderProcessing(unittest.TestCase):
         result = self.service.process_orders(user_id=1)
         self.assertFalse(result)
         self.db_service.get_orders_by_user.assert_called_once_with(1)
-        self.db_service.update_order_status.assert_not_called()
+        self.db_service.batch_update_order_status.assert_not_called()
 
     # Test successful processing of an export order with high priority
     def test_process_orders_export_order_success(self):
         order = Order(id=1, type=OrderType.EXPORT, amount=Configuration.HIGH_PRIORITY_THRESHOLD + 1, flag=True)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.db_service.update_order_status.return_value = True
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
-        self.file_exporter.export_order_to_file.assert_called_once_with(order, 1)
+        self.file_exporter.export_batch.assert_called_once_with([order], 1)
         self.assertEqual(order.status, OrderStatus.EXPORTED)
         self.assertEqual(order.priority, OrderPriority.HIGH)
-        self.db_service.update_order_status.assert_called_once_with(1, OrderStatus.EXPORTED, OrderPriority.HIGH)
+        self.db_service.batch_update_order_status.assert_called_once_with([(1, OrderStatus.EXPORTED.value, OrderPriority.HIGH.value)])
 
     # Test processing an export order when file export fails
     def test_process_orders_export_order_file_export_fails(self):
         order = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.file_exporter.export_order_to_file.side_effect = FileExportException("File export error")
-        self.db_service.update_order_status.return_value = True
+        self.file_exporter.export_batch.side_effect = FileExportException("File export error")
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
         self.assertEqual(order.status, OrderError.EXPORT_FAILED)
         self.assertEqual(order.priority, OrderPriority.LOW)
-        self.db_service.update_order_status.assert_called_once_with(1, OrderError.EXPORT_FAILED, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([(1, OrderError.EXPORT_FAILED.value, OrderPriority.LOW.value)])
 
     # Test successful processing of an API order with "processed" status
     def test_process_orders_api_order_success_processed(self):
         order = Order(id=2, type=OrderType.API, amount=Configuration.API_AMOUNT_THRESHOLD - 1, flag=False)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.api_client.call_api.return_value = APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD)
-        self.db_service.update_order_status.return_value = True
+        self.api_client.call_api_many.return_value = [APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD)]
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
         self.assertEqual(order.status, OrderStatus.PROCESSED)
         self.assertEqual(order.priority, OrderPriority.LOW)
-        self.db_service.update_order_status.assert_called_once_with(2, OrderStatus.PROCESSED, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([(2, OrderStatus.PROCESSED.value, OrderPriority.LOW.value)])
 
     # Test processing an API order when API call fails
     def test_process_orders_api_order_api_failure(self):
         order = Order(id=2, type=OrderType.API, amount=50, flag=False)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.api_client.call_api.side_effect = APIException("API Failure")
-        self.db_service.update_order_status.return_value = True
+        self.api_client.call_api_many.side_effect = APIException("API Failure")
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
         self.assertEqual(order.status, OrderError.API_FAILURE)
-        self.db_service.update_order_status.assert_called_once_with(2, OrderError.API_FAILURE, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([(2, OrderError.API_FAILURE.value, OrderPriority.LOW.value)])
 
     # Test successful processing of a simple order with "completed" status
     def test_process_orders_simple_order_completed(self):
         order = Order(id=3, type=OrderType.SIMPLE, amount=300, flag=True)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.db_service.update_order_status.return_value = True
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
         self.assertEqual(order.status, OrderStatus.COMPLETED)
         self.assertEqual(order.priority, OrderPriority.HIGH)
-        self.db_service.update_order_status.assert_called_once_with(3, OrderStatus.COMPLETED, OrderPriority.HIGH)
+        self.db_service.batch_update_order_status.assert_called_once_with([(3, OrderStatus.COMPLETED.value, OrderPriority.HIGH.value)])
 
     # Test processing an order with an unknown type
     def test_process_orders_unknown_type(self):
         order = Order(id=4, type=OrderType.UNKNOWN, amount=50, flag=False)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.db_service.update_order_status.return_value = True
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
         self.assertEqual(order.status, OrderError.UNKNOWN_TYPE)
         self.assertEqual(order.priority, OrderPriority.LOW)
-        self.db_service.update_order_status.assert_called_once_with(4, OrderError.UNKNOWN_TYPE, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([(4, OrderError.UNKNOWN_TYPE.value, OrderPriority.LOW.value)])
 
     # Test processing when database update fails (returns False)
     def test_process_orders_db_update_fails(self):
         order = Order(id=5, type=OrderType.SIMPLE, amount=50, flag=False)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.db_service.update_order_status.return_value = False
+        self.db_service.batch_update_order_status.return_value = {5}
         result = self.service.process_orders(user_id=1)
         self.assertFalse(result)
         self.assertEqual(order.status, OrderError.DB_ERROR)
-        self.db_service.update_order_status.assert_called_once_with(5, OrderStatus.IN_PROGRESS, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([(5, OrderStatus.IN_PROGRESS.value, OrderPriority.LOW.value)])
 
     # Test processing when database update throws an exception
     def test_process_orders_db_exception(self):
         order = Order(id=5, type=OrderType.SIMPLE, amount=50, flag=False)
         self.db_service.get_orders_by_user.return_value = [order]
-        self.db_service.update_order_status.side_effect = DatabaseException("Database error")
+        self.db_service.batch_update_order_status.side_effect = DatabaseException("Database error")
         result = self.service.process_orders(user_id=1)
         self.assertFalse(result)
         self.assertEqual(order.status, OrderError.DB_ERROR)
-        self.db_service.update_order_status.assert_called_once_with(5, OrderStatus.IN_PROGRESS, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([(5, OrderStatus.IN_PROGRESS.value, OrderPriority.LOW.value)])
+
+    # Test that only orders reported as failed by the batch update get "db_error"
+    def test_process_orders_db_update_partial_failure(self):
+        order1 = Order(id=1, type=OrderType.SIMPLE, amount=50, flag=True)
+        order2 = Order(id=2, type=OrderType.SIMPLE, amount=50, flag=False)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        self.db_service.batch_update_order_status.return_value = {2}
+        result = self.service.process_orders(user_id=1)
+        self.assertFalse(result)
+        self.assertEqual(order1.status, OrderStatus.COMPLETED)
+        self.assertEqual(order2.status, OrderError.DB_ERROR)
+
+    # Test that final status and priority are only written after the batched update
+    def test_process_orders_written_after_db_update(self):
+        order1 = Order(id=3, type=OrderType.SIMPLE, amount=300, flag=True)
+        order2 = Order(id=4, type=OrderType.EXPORT, amount=300, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        seen = []
+
+        def batch_update_order_status(updates):
+            seen.extend((order.status, order.priority) for order in (order1, order2))
+            return {4}
+
+        self.db_service.batch_update_order_status.side_effect = batch_update_order_status
+        result = self.service.process_orders(user_id=1)
+        self.assertFalse(result)
+        # Export orders are marked exported before the CSV rows are written.
+        self.assertEqual(seen, [(OrderStatus.NEW, OrderPriority.LOW), (OrderStatus.EXPORTED, OrderPriority.LOW)])
+        self.assertEqual(order1.status, OrderStatus.COMPLETED)
+        self.assertEqual(order1.priority, OrderPriority.HIGH)
+        self.assertEqual(order2.status, OrderError.DB_ERROR)
+        self.assertEqual(order2.priority, OrderPriority.HIGH)
 
     # Test processing multiple orders with one export failure
     def test_process_orders_multiple_orders_with_one_failure(self):
         order1 = Order(id=1, type=OrderType.SIMPLE, amount=50, flag=True)
         order2 = Order(id=2, type=OrderType.EXPORT, amount=100, flag=True)
         self.db_service.get_orders_by_user.return_value = [order1, order2]
-        self.db_service.update_order_status.return_value = True
-        self.file_exporter.export_order_to_file.side_effect = FileExportException("Export failed")
+        self.file_exporter.export_batch.side_effect = FileExportException("Export failed")
         result = self.service.process_orders(user_id=1)
         self.assertTrue(result)
         self.assertEqual(order1.status, OrderStatus.COMPLETED)
         self.assertEqual(order2.status, OrderError.EXPORT_FAILED)
-        self.db_service.update_order_status.assert_any_call(1, OrderStatus.COMPLETED, OrderPriority.LOW)
-        self.db_service.update_order_status.assert_any_call(2, OrderError.EXPORT_FAILED, OrderPriority.LOW)
+        self.db_service.batch_update_order_status.assert_called_once_with([
+            (1, OrderStatus.COMPLETED.value, OrderPriority.LOW.value),
+            (2, OrderError.EXPORT_FAILED.value, OrderPriority.LOW.value)
+        ])
+
+    # Test that updates are submitted in a single batch sorted by order id
+    def test_process_orders_batch_update_sorted_by_id(self):
+        order1 = Order(id=7, type=OrderType.SIMPLE, amount=50, flag=True)
+        order2 = Order(id=3, type=OrderType.SIMPLE, amount=50, flag=False)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        result = self.service.process_orders(user_id=1)
+        self.assertTrue(result)
+        self.db_service.update_order_status.assert_not_called()
+        self.db_service.batch_update_order_status.assert_called_once_with([
+            (3, OrderStatus.IN_PROGRESS.value, OrderPriority.LOW.value),
+            (7, OrderStatus.COMPLETED.value, OrderPriority.LOW.value)
+        ])
+
+    # Test that an unexpected export error fails processing without saving any order
+    def test_process_orders_export_unexpected_error(self):
+        order = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order]
+        self.file_exporter.export_batch.side_effect = Exception("Unexpected error")
+        result = self.service.process_orders(user_id=1)
+        self.assertFalse(result)
+        self.db_service.batch_update_order_status.assert_not_called()
+
+    # Test that all export orders are written in one export_batch call
+    def test_process_orders_export_orders_batched(self):
+        order1 = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        order2 = Order(id=2, type=OrderType.SIMPLE, amount=100, flag=True)
+        order3 = Order(id=3, type=OrderType.EXPORT, amount=100, flag=False)
+        self.db_service.get_orders_by_user.return_value = [order1, order2, order3]
+        result = self.service.process_orders(user_id=1)
+        self.assertTrue(result)
+        self.file_exporter.export_batch.assert_called_once_with([order1, order3], 1)
+        self.file_exporter.export_order_to_file.assert_not_called()
+        self.assertEqual(order1.status, OrderStatus.EXPORTED)
+        self.assertEqual(order3.status, OrderStatus.EXPORTED)
+
+    def record_threads(self):
+        threads = {}
+
+        def call_api_many(order_ids):
+            threads.setdefault('api', []).append(threading.get_ident())
+            return [APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD)] * len(order_ids)
+
+        def export_batch(orders, user_id):
+            threads.setdefault('export', []).append(threading.get_ident())
+            return []
+
+        self.api_client.call_api_many.side_effect = call_api_many
+        self.file_exporter.export_batch.side_effect = export_batch
+        return threads
+
+    # Test that the API batch runs on the service's worker thread while exports run in the caller
+    def test_process_orders_api_call_overlaps_export(self):
+        service = OrderProcessingService(self.db_service, self.api_client, self.file_exporter, overlap_api_calls=True)
+        order1 = Order(id=1, type=OrderType.API, amount=150, flag=True)
+        order2 = Order(id=2, type=OrderType.EXPORT, amount=100, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        threads = self.record_threads()
+        self.assertTrue(service.process_orders(user_id=1))
+        self.assertTrue(service.process_orders(user_id=1))
+        self.assertEqual(threads['export'], [threading.get_ident()] * 2)
+        self.assertNotEqual(threads['api'][0], threading.get_ident())
+        self.assertEqual(threads['api'][0], threads['api'][1])
+        self.assertEqual(order1.status, OrderStatus.PENDING)
+        self.assertEqual(order2.status, OrderStatus.EXPORTED)
+
+    # Test that API calls stay in the caller thread unless overlapping is enabled
+    def test_process_orders_api_call_inline_by_default(self):
+        order1 = Order(id=1, type=OrderType.API, amount=150, flag=True)
+        order2 = Order(id=2, type=OrderType.EXPORT, amount=100, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        threads = self.record_threads()
+        self.assertTrue(self.service.process_orders(user_id=1))
+        self.assertEqual(threads['api'], [threading.get_ident()])
+        self.assertEqual(order1.status, OrderStatus.PENDING)
+
+    # Test that API calls stay in the caller thread when there are no exports to overlap
+    def test_process_orders_api_call_inline_without_exports(self):
+        service = OrderProcessingService(self.db_service, self.api_client, self.file_exporter, overlap_api_calls=True)
+        order = Order(id=1, type=OrderType.API, amount=150, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order]
+        threads = self.record_threads()
+        self.assertTrue(service.process_orders(user_id=1))
+        self.assertEqual(threads['api'], [threading.get_ident()])
+        self.assertEqual(order.status, OrderStatus.PENDING)
+
+    # Test that a failure when closing the export file only fails the export orders
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    def test_process_orders_export_close_fails(self, mock_open):
+        order1 = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        order2 = Order(id=2, type=OrderType.SIMPLE, amount=50, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        self.service.file_exporter = CSVFileExporter()
+        mock_open.return_value.__exit__.side_effect = OSError(errno.ENOSPC, "No space left on device")
+        result = self.service.process_orders(user_id=1)
+        self.assertTrue(result)
+        self.assertEqual(order1.status, OrderError.EXPORT_FAILED)
+        self.assertEqual(order2.status, OrderStatus.COMPLETED)
+        self.db_service.batch_update_order_status.assert_called_once_with([
+            (1, OrderError.EXPORT_FAILED.value, OrderPriority.LOW.value),
+            (2, OrderStatus.COMPLETED.value, OrderPriority.LOW.value)
+        ])
+
+    # Test that the export processor is created once per call, not once per order
+    @patch('order_processing.ExportOrderProcessor')
+    def test_process_orders_export_processor_created_once(self, mock_processor_class):
+        mock_processor_class.return_value.process_many.return_value = [ProcessingResult(status=OrderStatus.EXPORTED)] * 2
+        order1 = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        order2 = Order(id=2, type=OrderType.EXPORT, amount=100, flag=True)
+        self.db_service.get_orders_by_user.return_value = [order1, order2]
+        result = self.service.process_orders(user_id=1)
+        self.assertTrue(result)
+        mock_processor_class.assert_called_once_with(self.file_exporter, 1)
+        mock_processor_class.return_value.process_many.assert_called_once_with([order1, order2])
+        mock_processor_class.return_value.process.assert_not_called()
+
+    # Test that API orders are submitted in one call sorted by order id
+    def test_process_orders_api_orders_batched(self):
+        order1 = Order(id=9, type=OrderType.API, amount=150, flag=False)
+        order2 = Order(id=3, type=OrderType.SIMPLE, amount=50, flag=True)
+        order3 = Order(id=4, type=OrderType.API, amount=Configuration.API_AMOUNT_THRESHOLD - 1, flag=False)
+        self.db_service.get_orders_by_user.return_value = [order1, order2, order3]
+        self.api_client.call_api_many.return_value = [
+            APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD),
+            APIResponse(status='failed', data=0)
+        ]
+        result = self.service.process_orders(user_id=1)
+        self.assertTrue(result)
+        self.api_client.call_api_many.assert_called_once_with([4, 9])
+        self.api_client.call_api.assert_not_called()
+        self.assertEqual(order1.status, OrderError.API_ERROR)
+        self.assertEqual(order3.status, OrderStatus.PROCESSED)
 
     # Test processing when a general exception occurs
     def test_process_orders_general_exception(self):
@@ -132,9 +299,119 @@ class TestOrderProcessing(unittest.TestCase):
         result = self.service.process_orders(user_id=1)
         self.assertFalse(result)
 
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestOrderProcessingBulk(unittest.TestCase):
+    def setUp(self):
+        self.db_service = Mock(spec=DatabaseService)
+        self.api_client = Mock(spec=APIClient)
+        self.file_exporter = Mock(spec=FileExporter)
+        self.service = OrderProcessingService(self.db_service, self.api_client, self.file_exporter)
+        self.db_service.batch_update_order_status.return_value = set()
+        self.file_exporter.export_batch.return_value = []
+
+    def set_orders(self, orders):
+        self.db_service.get_orders_by_user.return_value = orders
+        self.db_service.get_orders_columns.return_value = DatabaseService.get_orders_columns(self.db_service, 1)
+
+    # Test bulk processing when no orders are returned from the database
+    def test_process_orders_bulk_no_orders(self):
+        self.set_orders([])
+        result = self.service.process_orders_bulk(user_id=1)
+        self.assertFalse(result)
+        self.db_service.batch_update_order_status.assert_not_called()
+
+    # Test bulk processing of simple orders without object-mode processing
+    def test_process_orders_bulk_simple_orders(self):
+        self.set_orders([
+            Order(id=2, type=OrderType.SIMPLE, amount=Configuration.HIGH_PRIORITY_THRESHOLD + 1, flag=True),
+            Order(id=1, type=OrderType.SIMPLE, amount=50, flag=False)
+        ])
+        result = self.service.process_orders_bulk(user_id=1)
+        self.assertTrue(result)
+        self.file_exporter.export_batch.assert_not_called()
+        self.db_service.batch_update_order_status.assert_called_once_with([
+            (1, OrderStatus.IN_PROGRESS.value, OrderPriority.LOW.value),
+            (2, OrderStatus.COMPLETED.value, OrderPriority.HIGH.value)
+        ])
+
+    # Test bulk processing of export, API and unknown orders
+    def test_process_orders_bulk_mixed_orders(self):
+        self.set_orders([
+            Order(id=1, type=OrderType.EXPORT, amount=100, flag=True),
+            Order(id=2, type=OrderType.API, amount=Configuration.API_AMOUNT_THRESHOLD - 1, flag=False),
+            Order(id=3, type=OrderType.UNKNOWN, amount=50, flag=False)
+        ])
+        self.api_client.call_api_many.return_value = [APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD)]
+        result = self.service.process_orders_bulk(user_id=1)
+        self.assertTrue(result)
+        self.file_exporter.export_batch.assert_called_once()
+        self.assertEqual(self.file_exporter.export_batch.call_args[0][1], 1)
+        self.api_client.call_api_many.assert_called_once_with([2])
+        self.db_service.batch_update_order_status.assert_called_once_with([
+            (1, OrderStatus.EXPORTED.value, OrderPriority.LOW.value),
+            (2, OrderStatus.PROCESSED.value, OrderPriority.LOW.value),
+            (3, OrderError.UNKNOWN_TYPE.value, OrderPriority.LOW.value)
+        ])
+
+    # Test bulk processing exporting orders with their stored priority
+    def test_process_orders_bulk_export_stored_priority(self):
+        order = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        order.priority = OrderPriority.HIGH
+        self.set_orders([order])
+        exported = []
+        def export_batch(orders, user_id):
+            exported.extend((order.id, order.status, order.priority) for order in orders)
+            return []
+
+        self.file_exporter.export_batch.side_effect = export_batch
+        result = self.service.process_orders_bulk(user_id=1)
+        self.assertTrue(result)
+        self.assertEqual(exported, [(1, OrderStatus.EXPORTED, OrderPriority.HIGH)])
+
+    # Test bulk processing when the database update throws an exception
+    def test_process_orders_bulk_db_exception(self):
+        self.set_orders([Order(id=5, type=OrderType.SIMPLE, amount=50, flag=False)])
+        self.db_service.batch_update_order_status.side_effect = DatabaseException("Database error")
+        result = self.service.process_orders_bulk(user_id=1)
+        self.assertFalse(result)
+
+class TestDatabaseService(unittest.TestCase):
+    class FakeDatabaseService(DatabaseService):
+        def get_orders_by_user(self, user_id):
+            return []
+
+        def update_order_status(self, order_id, status, priority):
+            return True
+
+    def setUp(self):
+        self.db_service = self.FakeDatabaseService()
+        self.db_service.update_order_status = Mock()
+
+    # Test batch update fallback calling the single-row update for each order
+    def test_batch_update_order_status_fallback(self):
+        self.db_service.update_order_status.return_value = True
+        failed_ids = self.db_service.batch_update_order_status([
+            (1, OrderStatus.COMPLETED.value, OrderPriority.LOW.value),
+            (2, OrderError.DB_ERROR.value, OrderPriority.HIGH.value)
+        ])
+        self.assertEqual(failed_ids, set())
+        self.db_service.update_order_status.assert_any_call(1, OrderStatus.COMPLETED, OrderPriority.LOW)
+        self.db_service.update_order_status.assert_any_call(2, OrderError.DB_ERROR, OrderPriority.HIGH)
+
+    # Test batch update fallback collecting ids of failed and raising updates
+    def test_batch_update_order_status_fallback_failures(self):
+        self.db_service.update_order_status.side_effect = [False, DatabaseException("Database error"), True]
+        failed_ids = self.db_service.batch_update_order_status([
+            (1, OrderStatus.COMPLETED.value, OrderPriority.LOW.value),
+            (2, OrderStatus.COMPLETED.value, OrderPriority.LOW.value),
+            (3, OrderStatus.COMPLETED.value, OrderPriority.LOW.value)
+        ])
+        self.assertEqual(failed_ids, {1, 2})
+
 class TestExportOrderProcessor(unittest.TestCase):
     def setUp(self):
         self.file_exporter = Mock(spec=FileExporter)
+        self.file_exporter.export_batch.return_value = []
         self.processor = ExportOrderProcessor(self.file_exporter, user_id=1)
 
     # Test successful processing of an export order
@@ -152,6 +429,138 @@ class TestExportOrderProcessor(unittest.TestCase):
         result = self.processor.process(order)
         self.assertEqual(result, ProcessingResult(error=OrderError.EXPORT_FAILED))
 
+    # Test batch processing of export orders
+    def test_process_many_export_success(self):
+        orders = [Order(id=1, type=OrderType.EXPORT, amount=100, flag=True),
+                  Order(id=2, type=OrderType.EXPORT, amount=100, flag=False)]
+        results = self.processor.process_many(orders)
+        self.assertEqual(results, [ProcessingResult(status=OrderStatus.EXPORTED)] * 2)
+        self.file_exporter.export_batch.assert_called_once_with(orders, 1)
+
+    # Test batch processing of export orders when export fails
+    def test_process_many_export_failed(self):
+        orders = [Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)]
+        self.file_exporter.export_batch.side_effect = FileExportException("Export failed")
+        results = self.processor.process_many(orders)
+        self.assertEqual(results, [ProcessingResult(error=OrderError.EXPORT_FAILED)])
+
+    # Test batch processing through the exporter fallback failing only the order whose file failed
+    def test_process_many_export_partial_failure(self):
+        processor = ExportOrderProcessor(TestFileExporter.FakeFileExporter(failing_ids={2}), user_id=1)
+        orders = [Order(id=order_id, type=OrderType.EXPORT, amount=100, flag=True) for order_id in (1, 2, 3)]
+        results = processor.process_many(orders)
+        self.assertEqual(results, [
+            ProcessingResult(status=OrderStatus.EXPORTED),
+            ProcessingResult(error=OrderError.EXPORT_FAILED),
+            ProcessingResult(status=OrderStatus.EXPORTED)
+        ])
+
+class TestFileExporter(unittest.TestCase):
+    class FakeFileExporter(FileExporter):
+        def __init__(self, failing_ids=()):
+            self.exported = []
+            self.failing_ids = failing_ids
+
+        def export_order_to_file(self, order, user_id):
+            if order.id in self.failing_ids:
+                raise FileExportException("Export failed")
+            self.exported.append((order.id, user_id))
+
+    # Test batch fallback exporting one file per order for the batch user
+    def test_export_batch_fallback(self):
+        exporter = self.FakeFileExporter()
+        failed_orders = exporter.export_batch([Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)], user_id=3)
+        self.assertEqual(exporter.exported, [(1, 3)])
+        self.assertEqual(failed_orders, [])
+
+    # Test batch fallback returning the orders whose export failed and exporting the rest
+    def test_export_batch_fallback_failures(self):
+        exporter = self.FakeFileExporter(failing_ids={2})
+        orders = [Order(id=order_id, type=OrderType.EXPORT, amount=100, flag=True) for order_id in (1, 2, 3)]
+        failed_orders = exporter.export_batch(orders, user_id=3)
+        self.assertEqual(failed_orders, [orders[1]])
+        self.assertEqual(exporter.exported, [(1, 3), (3, 3)])
+
+class TestExportOrderProcessorCSV(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+        self.processor = ExportOrderProcessor(CSVFileExporter(), user_id=1)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def read_export(self, user_id=1):
+        [csv_file] = [name for name in os.listdir(self.tmp_dir.name) if name.startswith(f'orders_type_A_{user_id}_')]
+        with open(csv_file, newline='') as file_handle:
+            return list(csv.reader(file_handle))
+
+    # Test processing a single export order outside a batch with a real CSV exporter
+    def test_process_export_csv(self):
+        order = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        result = self.processor.process(order)
+        self.assertEqual(result, ProcessingResult(status=OrderStatus.EXPORTED))
+        self.assertEqual(self.read_export(), [
+            ['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority'],
+            ['1', 'A', '100', 'true', 'exported', 'low']
+        ])
+
+    # Test batch processing of export orders with a real CSV exporter
+    def test_process_many_export_csv(self):
+        orders = [Order(id=1, type=OrderType.EXPORT, amount=100, flag=True),
+                  Order(id=2, type=OrderType.EXPORT, amount=Configuration.HIGH_VALUE_ORDER_THRESHOLD + 1, flag=False)]
+        results = self.processor.process_many(orders)
+        self.assertEqual(results, [ProcessingResult(status=OrderStatus.EXPORTED)] * 2)
+        self.assertEqual(self.read_export(), [
+            ['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority'],
+            ['1', 'A', '100', 'true', 'exported', 'low'],
+            ['2', 'A', str(orders[1].amount), 'false', 'exported', 'low'],
+            ['', '', '', '', 'Note', 'High value order']
+        ])
+
+    # Test batch processing of non-ASCII values with the same file encoding as single exports
+    def test_process_many_export_csv_non_ascii(self):
+        orders = [Order(id='commande-é', type=OrderType.EXPORT, amount=100, flag=True)]
+        results = self.processor.process_many(orders)
+        self.assertEqual(results, [ProcessingResult(status=OrderStatus.EXPORTED)])
+        self.assertEqual(self.read_export()[1], ['commande-é', 'A', '100', 'true', 'exported', 'low'])
+
+    # Test two batches interleaved on one exporter each writing their own file
+    def test_process_many_export_csv_interleaved_batches(self):
+        exporter = self.processor.file_exporter
+        other_processor = ExportOrderProcessor(exporter, user_id=2)
+        order1 = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        order2 = Order(id=2, type=OrderType.EXPORT, amount=50, flag=False)
+        order_rows = CSVFileExporter._order_rows
+
+        def interleaved_order_rows(exporter, orders):
+            # Start the batch of user 2 while the batch of user 1 is still open.
+            if orders[0] is order1:
+                self.assertEqual(other_processor.process_many([order2]), [ProcessingResult(status=OrderStatus.EXPORTED)])
+            return order_rows(exporter, orders)
+
+        with patch.object(CSVFileExporter, '_order_rows', interleaved_order_rows):
+            results = self.processor.process_many([order1])
+        self.assertEqual(results, [ProcessingResult(status=OrderStatus.EXPORTED)])
+        self.assertEqual(self.read_export(user_id=1), [
+            ['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority'],
+            ['1', 'A', '100', 'true', 'exported', 'low']
+        ])
+        self.assertEqual(self.read_export(user_id=2), [
+            ['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority'],
+            ['2', 'A', '50', 'false', 'exported', 'low']
+        ])
+
+    # Test that a buffered write error raised on close marks the batch as failed
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    def test_process_many_export_csv_close_error(self, mock_open):
+        mock_open.return_value.__exit__.side_effect = OSError(errno.ENOSPC, "No space left on device")
+        orders = [Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)]
+        results = self.processor.process_many(orders)
+        self.assertEqual(results, [ProcessingResult(error=OrderError.EXPORT_FAILED)])
+
 class TestAPIOrderProcessor(unittest.TestCase):
     def setUp(self):
         self.api_client = Mock(spec=APIClient)
@@ -234,6 +643,118 @@ class TestAPIOrderProcessor(unittest.TestCase):
         result = self.processor.determine_status(api_response, order)
         self.assertEqual(result, ProcessingResult(status=OrderStatus.ERROR))
 
+class TestAPIOrderProcessorMany(unittest.TestCase):
+    def setUp(self):
+        self.api_client = Mock(spec=APIClient)
+        self.processor = APIOrderProcessor(self.api_client)
+
+    # Test batch processing returning results in the input order
+    def test_process_many_success(self):
+        order1 = Order(id=5, type=OrderType.API, amount=150, flag=False)
+        order2 = Order(id=2, type=OrderType.API, amount=Configuration.API_AMOUNT_THRESHOLD - 1, flag=False)
+        self.api_client.call_api_many.return_value = [
+            APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD),
+            APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD - 1)
+        ]
+        results = self.processor.process_many([order1, order2])
+        self.api_client.call_api_many.assert_called_once_with([2, 5])
+        self.assertEqual(results, [
+            ProcessingResult(status=OrderStatus.PENDING),
+            ProcessingResult(status=OrderStatus.PROCESSED)
+        ])
+
+    # Test batch processing when the batch API call fails
+    def test_process_many_api_failure(self):
+        orders = [Order(id=1, type=OrderType.API, amount=50, flag=False),
+                  Order(id=2, type=OrderType.API, amount=50, flag=False)]
+        self.api_client.call_api_many.side_effect = APIException("API Failure")
+        results = self.processor.process_many(orders)
+        self.assertEqual(results, [ProcessingResult(error=OrderError.API_FAILURE)] * 2)
+
+    # Test batch processing without orders not calling the API
+    def test_process_many_empty(self):
+        self.assertEqual(self.processor.process_many([]), [])
+        self.api_client.call_api_many.assert_not_called()
+
+class TestAPIOrderProcessorCache(unittest.TestCase):
+    def setUp(self):
+        self.api_client = Mock(spec=APIClient)
+        self.api_client.call_api.return_value = APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD)
+        self.api_client.call_api_many.side_effect = lambda order_ids: [
+            APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD) for _ in order_ids
+        ]
+        self.order = Order(id=2, type=OrderType.API, amount=Configuration.API_AMOUNT_THRESHOLD - 1, flag=False)
+
+    # Test that responses are not cached by default
+    def test_process_without_cache(self):
+        processor = APIOrderProcessor(self.api_client)
+        processor.process(self.order)
+        processor.process(self.order)
+        self.assertEqual(self.api_client.call_api.call_count, 2)
+
+    # Test that a cached response is reused for the same order id
+    def test_process_with_cache(self):
+        processor = APIOrderProcessor(self.api_client, cache_size=10)
+        self.assertEqual(processor.process(self.order), ProcessingResult(status=OrderStatus.PROCESSED))
+        self.assertEqual(processor.process(self.order), ProcessingResult(status=OrderStatus.PROCESSED))
+        self.api_client.call_api.assert_called_once_with(2)
+
+    # Test that clear_cache forces a new API call
+    def test_clear_cache(self):
+        processor = APIOrderProcessor(self.api_client, cache_size=10)
+        processor.process(self.order)
+        processor.clear_cache()
+        processor.process(self.order)
+        self.assertEqual(self.api_client.call_api.call_count, 2)
+
+    # Test that batch processing only requests ids missing from the cache
+    def test_process_many_with_cache(self):
+        processor = APIOrderProcessor(self.api_client, cache_size=10)
+        processor.process(self.order)
+        other = Order(id=5, type=OrderType.API, amount=150, flag=True)
+        results = processor.process_many([other, self.order])
+        self.api_client.call_api_many.assert_called_once_with([5])
+        self.assertEqual(results, [
+            ProcessingResult(status=OrderStatus.PENDING),
+            ProcessingResult(status=OrderStatus.PROCESSED)
+        ])
+
+    # Test that the least recently used response is evicted when the cache is full
+    def test_cache_eviction(self):
+        processor = APIOrderProcessor(self.api_client, cache_size=1)
+        processor.process(self.order)
+        processor.process(Order(id=3, type=OrderType.API, amount=50, flag=False))
+        processor.process(self.order)
+        self.assertEqual(self.api_client.call_api.call_count, 3)
+
+    # Test that failed API responses are not cached
+    def test_failed_response_not_cached(self):
+        processor = APIOrderProcessor(self.api_client, cache_size=10)
+        self.api_client.call_api.return_value = APIResponse(status='failed', data=0)
+        self.assertEqual(processor.process(self.order), ProcessingResult(error=OrderError.API_ERROR))
+        self.api_client.call_api.return_value = APIResponse(status='success', data=Configuration.API_DATA_THRESHOLD)
+        self.assertEqual(processor.process(self.order), ProcessingResult(status=OrderStatus.PROCESSED))
+        self.assertEqual(self.api_client.call_api.call_count, 2)
+
+    # Test that failed API responses from a batch are not cached
+    def test_process_many_failed_response_not_cached(self):
+        processor = APIOrderProcessor(self.api_client, cache_size=10)
+        self.api_client.call_api_many.side_effect = None
+        self.api_client.call_api_many.return_value = [APIResponse(status='failed', data=0)]
+        processor.process_many([self.order])
+        processor.process_many([self.order])
+        self.assertEqual(self.api_client.call_api_many.call_count, 2)
+
+class TestAPIClient(unittest.TestCase):
+    class FakeAPIClient(APIClient):
+        def call_api(self, order_id):
+            return APIResponse(status='success', data=order_id)
+
+    # Test batch API fallback calling the single-order API for each id
+    def test_call_api_many_fallback(self):
+        responses = self.FakeAPIClient().call_api_many([1, 2])
+        self.assertEqual([response.data for response in responses], [1, 2])
+
 class TestSimpleOrderProcessor(unittest.TestCase):
     def setUp(self):
         self.processor = SimpleOrderProcessor()
@@ -312,4 +833,59 @@ class TestCSVFileExporter(unittest.TestCase):
         order = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
         with self.assertRaises(FileExportException) as context:
             self.exporter.export_order_to_file(order, user_id=1)
-        self.assertIn("Can not export csv", str(context.exception))
\ No newline at end of file
+        self.assertIn("Can not export csv", str(context.exception))
+
+    # Test batched export writing the header once for several orders
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    @patch('csv.writer')
+    def test_export_batch_success(self, mock_csv_writer, mock_open):
+        order1 = Order(id=1, type=OrderType.EXPORT, amount=100, flag=False)
+        order2 = Order(id=2, type=OrderType.EXPORT, amount=100, flag=True)
+        mock_writer = Mock()
+        mock_csv_writer.return_value = mock_writer
+        self.exporter.export_batch([order1, order2], user_id=1)
+        mock_open.assert_called_once()
+        self.assertTrue(mock_open.call_args[0][0].startswith('orders_type_A_1_'))
+        self.assertEqual(mock_open.call_args[1]['buffering'], CSVFileExporter.BATCH_BUFFER_SIZE)
+        mock_open.return_value.__exit__.assert_called_once()
+        mock_writer.writerow.assert_called_once_with(['ID', 'Type', 'Amount', 'Flag', 'Status', 'Priority'])
+
+    # Test batched export of several orders in one writerows call
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    @patch('csv.writer')
+    def test_export_batch_writerows(self, mock_csv_writer, mock_open):
+        order1 = Order(id=1, type=OrderType.EXPORT, amount=Configuration.HIGH_VALUE_ORDER_THRESHOLD + 1, flag=True)
+        order2 = Order(id=2, type=OrderType.EXPORT, amount=100, flag=False)
+        mock_writer = Mock()
+        mock_csv_writer.return_value = mock_writer
+        self.exporter.export_batch([order1, order2], user_id=1)
+        mock_writer.writerows.assert_called_once()
+        self.assertEqual(list(mock_writer.writerows.call_args[0][0]), [
+            [1, 'A', order1.amount, 'true', 'new', 'low'],
+            ['', '', '', '', 'Note', 'High value order'],
+            [2, 'A', 100, 'false', 'new', 'low']
+        ])
+
+    # Test batched export sampling the file timestamp once per batch
+    @patch('time.time', return_value=1700000000.5)
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    @patch('csv.writer')
+    def test_export_batch_timestamp(self, mock_csv_writer, mock_open, mock_time):
+        self.exporter.export_batch([Order(id=1, type=OrderType.EXPORT, amount=100, flag=True),
+                                    Order(id=2, type=OrderType.EXPORT, amount=100, flag=True)], user_id=7)
+        mock_time.assert_called_once_with()
+        self.assertEqual(mock_open.call_args[0][0], 'orders_type_A_7_1700000000.csv')
+
+    # Test batched export without any exported order not creating a file
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    def test_export_batch_empty(self, mock_open):
+        self.exporter.export_batch([], user_id=1)
+        mock_open.assert_not_called()
+
+    # Test batched export failure due to IO error
+    @patch('builtins.open', side_effect=IOError("IO Error"))
+    def test_export_batch_io_error(self, mock_open):
+        order = Order(id=1, type=OrderType.EXPORT, amount=100, flag=True)
+        with self.assertRaises(FileExportException) as context:
+            self.exporter.export_batch([order], user_id=1)
+        self.assertIn("Can not export csv", str(context.exception))